@@ -1,69 +1,260 @@
-from flask import Flask, jsonify, request
+import os
+import json
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import desc
-from models import Link, MonitoringLog, engine
-from scanner import ping_host, get_real_stats  # <--- FIXED IMPORT
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy import func, or_, select
+from models import Link, MonitoringLog, engine, init_db
+from scanner import ping_hosts_async, get_real_stats  # <--- FIXED IMPORT
+from cache import cache_get, cache_set, INVENTORY_KEY, INVENTORY_TTL, STATS_KEY, STATS_TTL
+
+# FAST JSON (optional - falls back to stdlib json)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    print("WARNING: 'orjson' not installed. Run: pip install orjson")
+
+# GZIP (optional)
+try:
+    from flask_compress import Compress
+    HAS_COMPRESS = True
+except ImportError:
+    HAS_COMPRESS = False
+    print("WARNING: 'flask-compress' not installed. Run: pip install flask-compress")
+
+class ORJSONProvider(DefaultJSONProvider):
+    """App-wide orjson: covers jsonify() and request.get_json() too.
+    dumps honours sort_keys (app setting or per call), default and indent (always 2 spaces);
+    orjson has no other options, so the rest (ensure_ascii, separators, loads hooks) are ignored."""
+    def dumps(self, obj, **kwargs):
+        option = 0
+        if kwargs.get('sort_keys', self.sort_keys): option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'): option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
-CORS(app)
+if HAS_ORJSON: app.json = ORJSONProvider(app)
+CORS(app, max_age=86400)  # browsers cache the preflight (scan_batch POSTs JSON)
+if HAS_COMPRESS: Compress(app)
 app.secret_key = 'AmberIT_Secret_Key'
 
-Session = sessionmaker(bind=engine)
+def dumps(obj):
+    if HAS_ORJSON: return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+def ojsonify(obj):
+    """Drop-in for jsonify() using orjson when available."""
+    return Response(dumps(obj), mimetype='application/json')
+
+def cached_real_stats(ip, vendor, fresh=False):
+    """get_real_stats() behind a short per-IP cache. Only good reads are cached.
+    fresh skips both this cache and the in-process SNMP one."""
+    key = f'{STATS_KEY}:{ip}'
+    if not fresh:
+        cached = cache_get(key)
+        if cached: return tuple(json.loads(cached))
+    rssi, speed, duplex = get_real_stats(ip, vendor, fresh)
+    if rssi != 0: cache_set(key, dumps([rssi, speed, duplex]), STATS_TTL)
+    return rssi, speed, duplex
+
+# Shared across requests: no per-request thread startup, a hard cap on SNMP
+# threads under bursts, and warm threads keep their per-thread SnmpEngine
+STATS_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix='stats')
+
+init_db()  # picks up indexes added since the DB file was created
+
+SessionLocal = sessionmaker(bind=engine)
+Session = scoped_session(SessionLocal)
+
+@app.teardown_appcontext
+def remove_session(exc=None):
+    # Hand the connection back to the pool after every request
+    Session.remove()
+
+# link_id -> (status, rssi) of its newest MonitoringLog, kept hot in memory.
+# scanner.py writes from another process, so instead of hooking the insert we
+# read only the logs added since the last refresh (PK range scan).
+_latest = {}
+_latest_id = 0
+_latest_lock = threading.Lock()
+
+def refresh_latest(s):
+    global _latest, _latest_id
+    with _latest_lock:
+        max_id = s.query(func.max(MonitoringLog.id)).scalar() or 0
+        if max_id < _latest_id:  # DB was reset underneath us
+            _latest, _latest_id = {}, 0
+        if max_id == _latest_id:
+            return _latest
+
+        if _latest_id == 0:
+            # Cold start: latest log per link in ONE query
+            latest = s.query(
+                MonitoringLog.link_id, func.max(MonitoringLog.id).label('mid')
+            ).group_by(MonitoringLog.link_id).subquery()
+            rows = s.query(MonitoringLog.link_id, MonitoringLog.status, MonitoringLog.rssi) \
+                .join(latest, MonitoringLog.id == latest.c.mid)
+        else:
+            rows = s.query(MonitoringLog.link_id, MonitoringLog.status, MonitoringLog.rssi) \
+                .filter(MonitoringLog.id > _latest_id, MonitoringLog.id <= max_id) \
+                .order_by(MonitoringLog.id)
+
+        fresh = dict(_latest)  # swap, don't mutate: readers may be iterating
+        for link_id, status, rssi in rows:
+            fresh[link_id] = (status, rssi)
+        _latest, _latest_id = fresh, max_id
+        return _latest
+
+# Exactly the JSON fields, already shaped by SQLite (no ORM objects, no Python fallbacks)
+INVENTORY_COLUMNS = (
+    Link.id.label('id'),
+    Link.link_id_str.label('link_id_str'),
+    func.coalesce(func.nullif(Link.link_name, ''), 'Unknown Client').label('name'),
+    Link.pop_name.label('pop'),
+    Link.client_ip.label('ip'),
+    Link.model.label('model'),
+    Link.vendor.label('vendor'),
+    Link.eth_speed.label('eth_speed'),
+    Link.eth_duplex.label('eth_duplex'),
+)
+INVENTORY_FIELDS = tuple(c.name for c in INVENTORY_COLUMNS)
+
+COLUMNAR_FIELDS = INVENTORY_FIELDS + ("status", "rssi")
+
+def query_inventory(s, q='', limit=None, offset=0, columnar=False):
+    """Inventory rows with their latest status, as plain dicts - or, if columnar,
+    {"columns": [...], "rows": [[...], ...]} (no repeated keys on the wire)."""
+    latest = refresh_latest(s)
+
+    query = s.query(*INVENTORY_COLUMNS)
+    if q:
+        # q is a literal substring: escape LIKE's own wildcards so '%' or '_' match themselves
+        like = '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        query = query.filter(or_(
+            Link.link_name.ilike(like, escape='\\'), Link.link_id_str.ilike(like, escape='\\'),
+            Link.client_ip.ilike(like, escape='\\'), Link.pop_name.ilike(like, escape='\\')
+        ))
+    if q or limit or offset:
+        query = query.order_by(Link.id).offset(offset)
+        if limit: query = query.limit(limit)
+
+    if columnar:
+        rows = [(*r, *latest.get(r[0], ("UNKNOWN", 0))) for r in query.all()]
+        return {"columns": COLUMNAR_FIELDS, "rows": rows}
+
+    data = []
+    for r in query.all():
+        # Rows are plain tuples in INVENTORY_FIELDS order: positional, no key lookups
+        row = dict(zip(INVENTORY_FIELDS, r))
+        row["status"], row["rssi"] = latest.get(r[0], ("UNKNOWN", 0))
+        data.append(row)
+    return data
+
+def inventory_etag(s):
+    """Changes whenever a scan logs results or links are added/removed."""
+    version = s.query(
+        select(func.max(MonitoringLog.id)).scalar_subquery(),
+        select(func.max(Link.id)).scalar_subquery(),
+        select(func.count(Link.id)).scalar_subquery()
+    ).one()
+    return hashlib.blake2b(repr(tuple(version)).encode(), digest_size=8).hexdigest()
+
+# (etag, q, limit, offset, columnar) -> encoded body; a new etag makes old entries dead
+_inv_cache = OrderedDict()
+_inv_cache_lock = threading.Lock()
+INV_CACHE_SIZE = 64
+
+def etag_matches(etag):
+    """If-None-Match check that also accepts the '<etag>:gzip' form flask-compress sends out."""
+    inm = request.if_none_match
+    return inm.star_tag or any(tag == etag or tag.startswith(etag + ':')
+                               for tag in inm.as_set(include_weak=True))
 
 @app.route('/api/inventory')
 def get_inventory():
     s = Session()
-    links = s.query(Link).all()
-    data = []
-    for l in links:
-        last = s.query(MonitoringLog).filter_by(link_id=l.id).order_by(desc(MonitoringLog.id)).first()
-        status = last.status if last else "UNKNOWN"
-        rssi = last.rssi if last else 0
-        
-        data.append({
-            "id": l.id,
-            "link_id_str": l.link_id_str,
-            "name": l.link_name or "Unknown Client",
-            "pop": l.pop_name,
-            "ip": l.client_ip,
-            "status": status,
-            "rssi": rssi,
-            "model": l.model,
-            "vendor": l.vendor,
-            "eth_speed": l.eth_speed,
-            "eth_duplex": l.eth_duplex
-        })
-    s.close()
-    return jsonify(data)
+
+    # Optional server-side paging/search: ?q=...&limit=100&offset=200
+    # ?format=columnar returns {"columns": [...], "rows": [[...]]}
+    columnar = request.args.get('format') == 'columnar'
+    q = request.args.get('q', '').strip()
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    # A negative LIMIT means "no limit" to SQLite and limit=0 would be an empty page
+    if (limit is not None and limit < 1) or offset < 0:
+        return ojsonify({"error": "limit must be >= 1 and offset >= 0"}), 400
+    full = not (q or limit or offset)
+
+    etag = inventory_etag(s)
+    if etag_matches(etag):
+        resp = Response(status=304)
+    else:
+        # In-process LRU, then Redis for the full list (shared by workers), then the DB
+        key = (etag, q, limit, offset, columnar)
+        with _inv_cache_lock:
+            body = _inv_cache.get(key)
+            if body is not None: _inv_cache.move_to_end(key)
+        if body is None:
+            rkey = f'{INVENTORY_KEY}:{etag}:{"col" if columnar else "rows"}'
+            body = cache_get(rkey) if full else None
+            if not body:
+                body = dumps(query_inventory(s, q, limit, offset, columnar))
+                if full: cache_set(rkey, body, INVENTORY_TTL)
+            with _inv_cache_lock:
+                _inv_cache[key] = body
+                while len(_inv_cache) > INV_CACHE_SIZE:
+                    _inv_cache.popitem(last=False)
+        resp = Response(body, mimetype='application/json')
+
+    resp.set_etag(etag)  # quoted, so clients and flask-compress round-trip it intact
+    resp.headers['Cache-Control'] = 'public, max-age=10'
+    return resp
 
 @app.route('/api/scan/<int:link_id>', methods=['POST'])
-def scan_triple_hop(link_id):
-    s = Session()
-    link = s.query(Link).get(link_id)
-    if not link: return jsonify({"error": "Not Found"}), 404
-    
-    hops = [
-        {"label": "Gateway", "ip": link.gateway_ip},
-        {"label": "Base Station", "ip": link.base_ip},
-        {"label": "Client Radio", "ip": link.client_ip}
-    ]
+async def scan_triple_hop(link_id):
+    # Async views run on their own loop thread, so no thread-scoped Session here
+    with SessionLocal() as s:
+        link = s.get(Link, link_id)
+        if not link: return ojsonify({"error": "Not Found"}), 404
     
+        hops = [
+            {"label": "Gateway", "ip": link.gateway_ip},
+            {"label": "Base Station", "ip": link.base_ip},
+            {"label": "Client Radio", "ip": link.client_ip}
+        ]
+        client_ip = link.client_ip
+        vendor = link.vendor or link.model or "Unknown"
+    fresh = request.args.get('fresh') == '1'  # "re-run" bypasses the stats cache
+
+    # One batched ping for all hops, alongside the SNMP stats fetch
+    live = [h["ip"] for h in hops if h["ip"] and h["ip"].lower() != 'none']
+    pinged, (rssi, speed, duplex) = await asyncio.gather(
+        ping_hosts_async(live),
+        # REAL STATS FETCH - on the shared pool (to_thread would use the per-request loop's
+        # executor: a new thread, and a new SnmpEngine, for every trace)
+        asyncio.wrap_future(STATS_POOL.submit(cached_real_stats, client_ip, vendor, fresh))
+    )
+
     results = []
     for hop in hops:
-        if hop["ip"] and hop["ip"].lower() != 'none':
-            lat, loss = ping_host(hop["ip"])
+        if hop["ip"] in pinged:
+            lat, loss = pinged[hop["ip"]]
             results.append({"label": hop["label"], "ip": hop["ip"], "latency": lat, "status": "UP" if loss == 0 else "DOWN"})
         else:
             results.append({"label": hop["label"], "ip": "N/A", "status": "SKIP"})
 
-    # REAL STATS FETCH
-    vendor = link.vendor or link.model or "Unknown"
-    rssi, speed, duplex = get_real_stats(link.client_ip, vendor) # <--- FIXED CALL
-    
-    s.close()
-    
-    return jsonify({
+    return ojsonify({
         "hops": results,
         "rssi": rssi,
         "eth_speed": speed,
@@ -71,5 +262,42 @@ def scan_triple_hop(link_id):
         "final_status": "UP" if rssi != 0 else "DOWN"
     })
 
+MAX_BATCH = 200
+MAX_ID = 2**63 - 1  # SQLite INTEGER range; bigger ids overflow in the driver
+
+def parse_ids(body):
+    """Validates the batch body once at the boundary: unique positive int ids, or None."""
+    ids = body.get('ids') if isinstance(body, dict) else None
+    if not isinstance(ids, list) or len(ids) > MAX_BATCH:
+        return None
+    # bool is an int subclass; floats like 1.7 must not be truncated to an id
+    if not all(isinstance(i, int) and not isinstance(i, bool) and 0 < i <= MAX_ID for i in ids):
+        return None
+    return list(dict.fromkeys(ids))
+
+@app.route('/api/scan_batch', methods=['POST'])
+def scan_batch():
+    """Radio stats for many links at once: {"ids": [1, 2, ...]} -> {id: stats}"""
+    ids = parse_ids(request.get_json(silent=True))
+    if ids is None:
+        return ojsonify({"error": f"ids must be a list of up to {MAX_BATCH} link ids"}), 400
+
+    s = Session()
+    links = s.query(Link).filter(Link.id.in_(ids)).all()  # one query for the whole batch
+
+    # Fan out: N devices cost ~max(RTT), not the sum
+    futs = {
+        l.id: STATS_POOL.submit(cached_real_stats, l.client_ip, l.vendor or l.model or "Unknown")
+        for l in links
+    }
+    results = {}
+    for lid, fut in futs.items():
+        rssi, speed, duplex = fut.result()
+        results[str(lid)] = {"rssi": rssi, "eth_speed": speed, "eth_duplex": duplex}
+
+    return ojsonify(results)
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Dev server only - production runs under gunicorn (see README)
+    app.run(host='0.0.0.0', port=5000, threaded=True,
+            debug=os.environ.get('FLASK_DEBUG') == '1')
\ No newline at end of file
@@ -0,0 +1,50 @@
+import os
+
+# REDIS LIBRARY (optional - without it every request just hits the DB)
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+    print("WARNING: 'redis' not installed. Run: pip install redis")
+
+REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
+REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
+
+INVENTORY_KEY = 'inv:v1'  # suffixed with the inventory ETag, so new data = new key
+INVENTORY_TTL = 15  # seconds
+STATS_KEY = 'rstats'  # + ':<client ip>' -> [rssi, speed, duplex], written by API and scanner
+STATS_TTL = 30      # seconds, per client IP
+
+rds = None
+if HAS_REDIS:
+    rds = redis.Redis(connection_pool=redis.ConnectionPool(
+        host=REDIS_HOST, port=REDIS_PORT, max_connections=32,
+        socket_connect_timeout=0.5, socket_timeout=0.5
+    ))
+
+def cache_get(key):
+    """Returns cached bytes, or None on miss / Redis down."""
+    if rds is None: return None
+    try:
+        return rds.get(key)
+    except Exception:
+        return None
+
+def cache_set(key, value, ttl):
+    if rds is None: return
+    try:
+        rds.setex(key, ttl, value)
+    except Exception:
+        pass
+
+def cache_set_many(items, ttl):
+    """{key: value} in one pipelined round-trip."""
+    if rds is None or not items: return
+    try:
+        pipe = rds.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.setex(key, ttl, value)
+        pipe.execute()
+    except Exception:
+        pass
@@ -1,6 +1,11 @@
 import pandas as pd
 import os
 
+def find_header(df, keywords, default):
+    """First column whose name contains every keyword (headers lowercased once)."""
+    lowered = [(str(c).lower(), c) for c in df.columns]
+    return next((c for hl, c in lowered if all(k in hl for k in keywords)), default)
+
 def create_organized_sheet():
     source_file = "import csv.xlsx"
     
@@ -22,15 +27,15 @@ def create_organized_sheet():
     df_radio = pd.DataFrame()
     
     for sheet_name, df in xls.items():
-        cols = [str(c).lower() for c in df.columns]
+        cols = {str(c).lower() for c in df.columns}
         
         # Look for Main Inventory (Keywords: link_id, gateway_ip)
-        if 'link_id' in cols or 'gateway_ip' in cols:
+        if cols & {'link_id', 'gateway_ip'}:
             print(f"-> Detected Main Inventory in sheet: '{sheet_name}'")
             df_main = df
             
         # Look for Radio Info (Keywords: rssi, radio model)
-        if 'rssi' in cols or 'radio model' in cols:
+        if cols & {'rssi', 'radio model'}:
             print(f"-> Detected Radio Data in sheet: '{sheet_name}'")
             df_radio = df
 
@@ -43,29 +48,25 @@ def create_organized_sheet():
     print("Merging data...")
     # Normalize Client IP for matching
     # Note: Adjust column names if they are slightly different in your specific Excel version
-    main_ip_col = next((c for c in df_main.columns if 'client' in str(c).lower() and 'ip' in str(c).lower()), 'Client_IP')
-    radio_ip_col = next((c for c in df_radio.columns if 'client' in str(c).lower() and 'ip' in str(c).lower()), 'Client IP')
+    main_ip_col = find_header(df_main, ('client', 'ip'), 'Client_IP')
+    radio_ip_col = find_header(df_radio, ('client', 'ip'), 'Client IP')
 
-    df_main['Client_IP_Match'] = df_main[main_ip_col].astype(str).str.strip()
-    df_radio['Client_IP_Match'] = df_radio[radio_ip_col].astype(str).str.strip()
+    # Join on the normalized IP as the index (hash join, no temporary match columns)
+    df_main.index = df_main[main_ip_col].astype(str).str.strip()
+    df_radio.index = df_radio[radio_ip_col].astype(str).str.strip()
 
-    merged = pd.merge(
-        df_main, 
-        df_radio, 
-        left_on='Client_IP_Match', 
-        right_on='Client_IP_Match', 
-        how='left', 
-        suffixes=('', '_Radio')
-    )
+    merged = df_main.join(df_radio, how='left', rsuffix='_Radio').reset_index(drop=True)
 
     # 4. Map Columns for Final Output
     # We safely get columns, defaulting to None if missing
+    lower_map = {}
+    for c in merged.columns:
+        lower_map.setdefault(str(c).lower(), c)  # keep the first match, like the old scan
+
     def get_col(df, keyword):
-        # Helper to find column case-insensitively
-        for c in df.columns:
-            if keyword.lower() == str(c).lower():
-                return df[c]
-        return None
+        # Helper to find column case-insensitively (O(1) via lower_map)
+        c = lower_map.get(keyword.lower())
+        return df[c] if c is not None else None
 
     final_df = pd.DataFrame()
     final_df['Link_ID'] = get_col(merged, 'Link_ID')
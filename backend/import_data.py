@@ -1,50 +1,89 @@
-import pandas as pd
-from sqlalchemy.orm import sessionmaker
+import openpyxl
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
 from models import Link, engine, init_db
 
+def clean_cell(v):
+    """Empty cells -> '', text trimmed like reset_db does."""
+    if v is None: return ''
+    if isinstance(v, str): return v.strip()
+    return v
+
+def link_id_text(v):
+    """Link_ID cell -> key text. Integral floats lose the '.0' (1001.0 -> '1001')."""
+    if isinstance(v, float) and v.is_integer(): v = int(v)
+    return str(v).strip()
+
+def iter_sheet_rows(ws):
+    """Streams the sheet as dicts keyed by header - one row in memory at a time."""
+    rows = ws.iter_rows(values_only=True)
+    header = [str(h).strip() if h is not None else '' for h in next(rows, ())]
+    for values in rows:
+        yield {h: clean_cell(v) for h, v in zip(header, values)}
+
+# Link column -> (sheet headers, first truthy wins, [converter])
+SHEET_FIELDS = (
+    ('link_name', ('Client_Name', 'Link Name')),
+    ('pop_name', ('POP_Name',)),
+    ('location', ('Location',)),
+    ('client_ip', ('Client_IP',)),
+    ('base_ip', ('Base_IP',)),
+    ('gateway_ip', ('Gateway_IP',)),
+    ('connection_type', ('Connection Type',)),
+    ('model', ('Radio Model',)),
+    ('frequency_used', ('Frequency Used',), str),
+    ('frequency_type', ('Frequency Type',)),
+    ('channel_width', ('Channel',)),
+    ('device_mode', ('Device Mode',)),
+    ('link_type', ('Link Type',)),
+    ('ssid', ('SSID',)),
+)
+
+def build_link(row, lid):
+    """Sheet row (dict) -> inventory insert params, driven by SHEET_FIELDS."""
+    link = {'link_id_str': lid}
+    for dest, headers, *convert in SHEET_FIELDS:
+        value = None
+        for h in headers:
+            value = row.get(h)
+            if value: break
+        link[dest] = convert[0](value) if convert else value
+    return link
+
 def import_excel_to_db(filename="Organized_Inventory_with_Radio_Data.xlsx"):
     init_db()
-    Session = sessionmaker(bind=engine)
-    session = Session()
     
     print(f"Reading {filename}...")
     try:
-        df = pd.read_excel(filename)
-        df = df.fillna('') # Handle empty cells
+        # read_only streams rows from the zip instead of building the whole sheet
+        wb = openpyxl.load_workbook(filename, read_only=True, data_only=True)
     except Exception as e:
         print(f"Error: {e}")
         return
     
-    count = 0
-    for _, row in df.iterrows():
+    # The old pandas importer stored numeric IDs from a column with blanks as '1001.0';
+    # reuse those keys so ON CONFLICT still recognises the rows
+    with engine.connect() as conn:
+        legacy = set(conn.scalars(select(Link.link_id_str).where(Link.link_id_str.like('%.0'))))
+
+    new_links = []
+    for row in iter_sheet_rows(wb.active):
         # Skip rows without Link ID
-        lid = str(row['Link_ID']).strip()
+        lid = link_id_text(row.get('Link_ID', ''))
         if not lid or lid.lower() == 'nan': continue
+        if lid + '.0' in legacy: lid += '.0'
         
-        # Avoid Duplicates
-        exists = session.query(Link).filter_by(link_id_str=lid).first()
-        if not exists:
-            link = Link(
-                link_id_str=lid,
-                link_name=row.get('Client_Name') or row.get('Link Name'),
-                pop_name=row.get('POP_Name'),
-                location=row.get('Location'),
-                client_ip=row.get('Client_IP'),
-                base_ip=row.get('Base_IP'),
-                gateway_ip=row.get('Gateway_IP'),
-                connection_type=row.get('Connection Type'),
-                model=row.get('Radio Model'),
-                frequency_used=str(row.get('Frequency Used')),
-                frequency_type=row.get('Frequency Type'),
-                channel_width=row.get('Channel'),
-                device_mode=row.get('Device Mode'),
-                link_type=row.get('Link Type'),
-                ssid=row.get('SSID')
-            )
-            session.add(link)
-            count += 1
+        # Duplicates (existing or within the sheet) are skipped by the INSERT itself
+        new_links.append(build_link(row, lid))
+    wb.close()
             
-    session.commit()
+    # Single executemany INSERT inside one transaction; known IDs are left untouched
+    count = 0
+    if new_links:
+        stmt = insert(Link).on_conflict_do_nothing(index_elements=['link_id_str'])
+        # Stays at synchronous=NORMAL: this is the live DB, and WAL already skips per-commit fsyncs
+        with engine.begin() as conn:
+            count = conn.execute(stmt, new_links).rowcount
     print(f"Successfully imported {count} links into the database.")
 
 if __name__ == "__main__":
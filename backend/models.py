@@ -1,5 +1,6 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean
+from sqlalchemy import create_engine, event, inspect, Column, Integer, String, Float, DateTime, Text, Boolean, Index
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import QueuePool
 from datetime import datetime
 
 Base = declarative_base()
@@ -54,8 +55,44 @@ class MonitoringLog(Base):
     loss = Column(Float)
     rssi = Column(Float)
 
+    # Serves "latest log per link" (MAX(id) GROUP BY link_id) straight from the index
+    __table_args__ = (Index('ix_mlog_link_latest', 'link_id', 'id'),)
+
 # Connect to DB
-engine = create_engine('sqlite:///amberit_noc.db') 
+# Pooled so app.py / scanner.py reuse connections instead of reconnecting per request
+engine = create_engine(
+    'sqlite:///amberit_noc.db',
+    connect_args={"check_same_thread": False},  # Flask serves from multiple threads
+    poolclass=QueuePool,
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    pool_use_lifo=True  # reuse the most recent connection: its page cache is warm
+)
+
+@event.listens_for(engine, "connect")
+def _sqlite_pragmas(dbapi_conn, _):
+    # WAL: scanner writes don't block API reads, and commits skip the full fsync
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    # Wait for the scanner's write lock instead of failing with "database is locked"
+    cur.execute("PRAGMA busy_timeout=5000")
+    # Pooled connections live long, so a big warm page cache + mmap'd reads pay off
+    cur.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cur.execute("PRAGMA cache_size=-65536")    # 64 MB
+    cur.close()
 
 def init_db():
-    Base.metadata.create_all(engine)
\ No newline at end of file
+    """Creates missing tables/indexes. Cheap when the schema is already current."""
+    Base.metadata.create_all(engine)
+    # create_all skips indexes on tables that already exist (old DB files):
+    # read each table's index list once and only create what is missing
+    insp = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        have = {ix['name'] for ix in insp.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in have:
+                index.create(engine)
\ No newline at end of file
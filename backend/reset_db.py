@@ -1,10 +1,106 @@
 import os
+from itertools import islice
+import openpyxl
+import numpy as np
 import pandas as pd
-from sqlalchemy.orm import sessionmaker
 from models import Link, engine, init_db
 
 DB_FILE = "amberit_noc.db"
 EXCEL_FILE = "Organized_Inventory_with_Radio_Data.xlsx"
+BATCH_SIZE = 10000  # sheet rows per chunk / bulk INSERT
+
+# Link column <- sheet header (copied as trimmed text)
+RESET_FIELDS = (
+    ('pop_name', 'POP_Name'),
+    ('location', 'Location'),
+    ('client_ip', 'Client_IP'),
+    ('base_ip', 'Base_IP'),
+    ('gateway_ip', 'Gateway_IP'),
+    # Tech Details
+    ('connection_type', 'Connection Type'),
+    ('channel_width', 'Channel'),
+    ('ssid', 'SSID'),
+    ('device_mode', 'Device Mode'),
+    ('link_type', 'Link Type'),
+    ('frequency_type', 'Frequency Type'),
+    ('frequency_used', 'Frequency Used'),
+    ('model', 'Radio Model'),
+)
+# Only these sheet columns are materialised (usecols) - the rest never reach pandas
+USED_HEADERS = frozenset(('Link_ID', 'Link_Name', *(header for _, header in RESET_FIELDS)))
+
+def text_col(df, header):
+    """Whole column as trimmed text ('' when the sheet lacks it)."""
+    if header not in df: return pd.Series('', index=df.index)
+    return df[header].astype(str).str.strip()
+
+def iter_sheet_chunks(ws, size=BATCH_SIZE):
+    """Streams the sheet as DataFrames of `size` rows, indexed by sheet row - 2."""
+    rows = ws.iter_rows(values_only=True)
+    header = [str(h).strip() if h is not None else '' for h in next(rows, ())] # Clean headers
+    cols = {}
+    for i, h in enumerate(header):
+        if h in USED_HEADERS: cols.setdefault(h, i)  # first wins if a header repeats
+    names, idx = list(cols), list(cols.values())
+    start = 0
+    while True:
+        chunk = [[r[i] if i < len(r) else None for i in idx] for r in islice(rows, size)]
+        if not chunk: break
+        # object dtype: keep cells as typed in the sheet (no per-chunk int -> float upcast)
+        df = pd.DataFrame(chunk, columns=names, index=range(start, start + len(chunk)), dtype=object)
+        yield df.fillna('') # Replace empty cells
+        start += len(chunk)
+
+def build_links(df, seen_ids, next_suffix):
+    """One chunk of sheet rows -> Link insert mappings. seen_ids/next_suffix carry across chunks."""
+    # Column-at-a-time string ops instead of a Python loop over iterrows()
+    lids = text_col(df, 'Link_ID')
+    
+    # Skip empty rows
+    keep = (lids != '') & (lids.str.lower() != 'nan')
+    df, lids = df[keep], lids[keep]
+    
+    # --- DUPLICATE FIXER ---
+    # If we have seen this ID before, rename it to prevent crash.
+    # next_suffix resumes each ID's search where it stopped, so k copies cost O(k), not O(k^2)
+    ids = []
+    for index, lid in lids.items():
+        if lid in seen_ids:
+            original_lid = lid
+            dup_counter = next_suffix.get(original_lid, 1)
+            while lid in seen_ids:
+                lid = f"{original_lid}_{dup_counter}"
+                dup_counter += 1
+            next_suffix[original_lid] = dup_counter
+            print(f"   [WARN] Row {index+2}: Duplicate ID '{original_lid}' -> Renamed to '{lid}'")
+        seen_ids.add(lid)
+        ids.append(lid)
+    ids = pd.Series(ids, index=df.index, dtype=object)
+    
+    # --- NAME FIX ---
+    names = text_col(df, 'Link_Name')
+    names = names.where((names != '') & (names.str.lower() != 'nan'), 'Link-' + ids)
+    
+    fields = {dest: text_col(df, header) for dest, header in RESET_FIELDS}
+    
+    # Determine Vendor
+    model = fields['model']
+    vendor = np.select(
+        [model.str.contains('epmp|cambium', case=False),
+         model.str.contains('powerbeam|nano|ubiquiti', case=False),
+         model.str.contains('mimosa', case=False)],
+        ['Cambium', 'Ubiquiti', 'Mimosa'], default='Generic')
+    
+    return pd.DataFrame({
+        'link_id_str': ids,
+        'link_name': names,
+        'vendor': vendor,
+        **fields,
+        
+        # Default Status
+        'eth_speed': "Unknown",
+        'eth_duplex': "Unknown",
+    }).to_dict('records')
 
 def reset_and_import():
     print("--- AMBERIT NOC: FACTORY RESET TOOL ---")
@@ -17,6 +113,10 @@ def reset_and_import():
         except PermissionError:
             print("[ERROR] Database is locked! Please CLOSE 'app.py' and 'scanner.py'.")
             return
+    # WAL side files must go too, or SQLite replays stale pages into the new DB
+    for side in (DB_FILE + "-wal", DB_FILE + "-shm"):
+        if os.path.exists(side):
+            os.remove(side)
 
     # 2. CREATE NEW DB
     print("[INFO] Initializing new database schema...")
@@ -25,84 +125,33 @@ def reset_and_import():
     # 3. IMPORT DATA
     print(f"[INFO] Reading {EXCEL_FILE}...")
     try:
-        df = pd.read_excel(EXCEL_FILE)
-        df = df.fillna('') # Replace empty cells
-        df.columns = df.columns.str.strip() # Clean headers
+        # read_only streams rows from the zip: memory stays at one chunk, not the workbook
+        wb = openpyxl.load_workbook(EXCEL_FILE, read_only=True, data_only=True)
     except Exception as e:
         print(f"[ERROR] Could not read Excel file: {e}")
         return
 
-    Session = sessionmaker(bind=engine)
-    session = Session()
-    
     count = 0
     seen_ids = set() # To track duplicates
+    next_suffix = {} # original ID -> next rename suffix to try
     
     print("[INFO] Processing rows...")
     
-    for index, row in df.iterrows():
-        # Get ID
-        lid = str(row.get('Link_ID', '')).strip()
-        
-        # Skip empty rows
-        if not lid or lid.lower() == 'nan': continue
-        
-        # --- DUPLICATE FIXER ---
-        # If we have seen this ID before, rename it to prevent crash
-        if lid in seen_ids:
-            original_lid = lid
-            dup_counter = 1
-            while lid in seen_ids:
-                lid = f"{original_lid}_{dup_counter}"
-                dup_counter += 1
-            print(f"   [WARN] Row {index+2}: Duplicate ID '{original_lid}' -> Renamed to '{lid}'")
-        
-        seen_ids.add(lid)
-        
-        # --- NAME FIX ---
-        raw_name = str(row.get('Link_Name', '')).strip()
-        if not raw_name or raw_name.lower() == 'nan':
-            raw_name = f"Link-{lid}" 
-            
-        # Hardware Info
-        model = str(row.get('Radio Model', '')).strip()
-        ip = str(row.get('Client_IP', '')).strip()
-        
-        # Determine Vendor
-        vendor = "Generic"
-        if "epmp" in model.lower() or "cambium" in model.lower(): vendor = "Cambium"
-        elif "powerbeam" in model.lower() or "nano" in model.lower() or "ubiquiti" in model.lower(): vendor = "Ubiquiti"
-        elif "mimosa" in model.lower(): vendor = "Mimosa"
-
-        link = Link(
-            link_id_str=lid,
-            link_name=raw_name, 
-            pop_name=str(row.get('POP_Name', '')).strip(),
-            location=str(row.get('Location', '')).strip(),
-            client_ip=ip,
-            base_ip=str(row.get('Base_IP', '')).strip(),
-            gateway_ip=str(row.get('Gateway_IP', '')).strip(),
-            
-            # Tech Details
-            connection_type=str(row.get('Connection Type', '')),
-            channel_width=str(row.get('Channel', '')),
-            ssid=str(row.get('SSID', '')),
-            device_mode=str(row.get('Device Mode', '')),
-            link_type=str(row.get('Link Type', '')),
-            frequency_type=str(row.get('Frequency Type', '')),
-            frequency_used=str(row.get('Frequency Used', '')),
-            model=model,
-            vendor=vendor,
-            
-            # Default Status
-            eth_speed="Unknown",
-            eth_duplex="Unknown"
-        )
-        session.add(link)
-        count += 1
-        
-    session.commit()
-    session.close()
+    # One explicit transaction for the whole load; Core inserts skip the ORM unit of work
+    with engine.connect() as conn:
+        # Brand-new file: a crash mid-load just means re-running the reset, so skip fsync
+        conn.exec_driver_sql("PRAGMA synchronous=OFF")
+        try:
+            for df in iter_sheet_chunks(wb.active):
+                links = build_links(df, seen_ids, next_suffix)
+                if links: conn.execute(Link.__table__.insert(), links)
+                count += len(links)
+            conn.commit()
+        finally:
+            conn.rollback()  # no-op after commit; a failed load must end its txn before the PRAGMA
+            conn.exec_driver_sql("PRAGMA synchronous=NORMAL")
+            conn.commit()
+    wb.close()
     print(f"\n[SUCCESS] Imported {count} links.")
     print("---------------------------------------")
     print("1. Close all python windows.")
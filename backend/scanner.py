@@ -1,9 +1,18 @@
 import subprocess
+import json
 import re
 import time
+import shutil
+import ipaddress
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from datetime import datetime
+from sqlalchemy import insert, select
 from sqlalchemy.orm import sessionmaker
-from models import Link, MonitoringLog, engine
+from models import Link, MonitoringLog, engine, init_db
+from cache import cache_set_many, STATS_KEY, STATS_TTL
 
 # SNMP LIBRARY
 try:
@@ -13,65 +22,129 @@ except ImportError:
     HAS_SNMP = False
     print("WARNING: 'pysnmp' not installed. Run: pip install pysnmp")
 
+# ICMP LIBRARY (optional - pings straight from Python sockets, no process per batch)
+try:
+    from icmplib import multiping, async_multiping, ICMPv4Socket, ICMPLibError, SocketPermissionError
+    HAS_ICMPLIB = True
+except ImportError:
+    HAS_ICMPLIB = False
+    print("WARNING: 'icmplib' not installed. Run: pip install icmplib")
+
 PING_TIMEOUT_MS = 1000
 COMMUNITY_STRING = 'public' 
 
-def snmp_get(ip, oid):
-    """Real SNMP Query Function"""
-    if not HAS_SNMP: return None
+# Compiled once - ping_host runs for every link on every cycle
+_PING_TIME_RE = re.compile(rb"time[=<](\d+)ms")  # bytes: stdout is never decoded
+_PING_RECEIVED = b"Received = 1"
+
+FPING = shutil.which('fping')  # None -> fall back to one 'ping' per host
+
+_snmp_local = threading.local()
+
+def snmp_engine():
+    """One reusable SnmpEngine per thread (engines are not thread-safe, and
+    building one costs far more than the GET itself)."""
+    engine = getattr(_snmp_local, 'engine', None)
+    if engine is None:
+        engine = _snmp_local.engine = SnmpEngine()
+    return engine
+
+# Request descriptors are immutable: build them once, and one transport
+# target per radio (its constructor resolves the address every time)
+if HAS_SNMP:
+    SNMP_AUTH = CommunityData(COMMUNITY_STRING, mpModel=1)  # SNMP v2c
+    SNMP_CONTEXT = ContextData()
+_snmp_targets = {}
+
+def snmp_target(ip):
+    target = _snmp_targets.get(ip)
+    if target is None:
+        target = _snmp_targets[ip] = UdpTransportTarget((ip, 161), timeout=1, retries=1)
+    return target
+
+# (ip, oid) -> (expires_at, value). Coalesces repeat traces/dashboards hitting
+# the same radio within a few seconds; only answered OIDs are stored.
+SNMP_CACHE_TTL = 5  # seconds
+SNMP_CACHE_MAX = 4096
+_snmp_cache = {}
+_snmp_cache_lock = threading.Lock()
+
+def snmp_get_many(ip, oids, fresh=False):
+    """All OIDs in ONE GET PDU, served from the short TTL cache when fresh.
+    fresh=True always asks the device (the answer still refreshes the cache)."""
+    now = time.monotonic()
+    if not fresh:
+        with _snmp_cache_lock:
+            hits = [_snmp_cache.get((ip, oid)) for oid in oids]
+        if all(h and h[0] > now for h in hits):
+            return [h[1] for h in hits]
+
+    values = _snmp_query(ip, oids)
+    expires = now + SNMP_CACHE_TTL
+    with _snmp_cache_lock:
+        if len(_snmp_cache) >= SNMP_CACHE_MAX:
+            _snmp_cache.clear()
+        for oid, val in zip(oids, values):
+            if val is not None: _snmp_cache[(ip, oid)] = (expires, val)
+    return values
+
+def _snmp_query(ip, oids):
+    """Real SNMP Query Function - all OIDs in ONE GET PDU (one round-trip).
+    Returns a value per OID, or Nones if the device didn't answer."""
+    if not HAS_SNMP: return [None] * len(oids)
     try:
         iterator = getCmd(
-            SnmpEngine(),
-            CommunityData(COMMUNITY_STRING, mpModel=1), # SNMP v2c
-            UdpTransportTarget((ip, 161), timeout=1, retries=1),
-            ContextData(),
-            ObjectType(ObjectIdentity(oid))
+            snmp_engine(),
+            SNMP_AUTH,
+            snmp_target(ip),
+            SNMP_CONTEXT,
+            *[ObjectType(ObjectIdentity(oid)) for oid in oids]
         )
         errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
         
         if errorIndication or errorStatus:
-            return None
+            return [None] * len(oids)
         
-        for varBind in varBinds:
-            return varBind[1]
+        return [varBind[1] for varBind in varBinds]
     except:
-        return None
+        return [None] * len(oids)
+
+def snmp_get(ip, oid):
+    return snmp_get_many(ip, [oid])[0]
+
+LAN_SPEED_OID = '1.3.6.1.2.1.2.2.1.5.1'  # ifSpeed, port 1
+SPEED_NAMES = {10000000: "10Mbps", 100000000: "100Mbps", 1000000000: "1Gbps"}
+
+# Vendor/model keywords -> OIDs fetched in one GET (RSSI first, then LAN speed)
+VENDOR_OID_PLANS = (
+    (('cambium', 'epmp'), ('1.3.6.1.4.1.17713.21.1.2.1.0', LAN_SPEED_OID)),           # CAMBIUM ePMP
+    (('ubiquiti', 'powerbeam', 'nano'), ('1.3.6.1.4.1.41112.1.4.5.1.5.1', LAN_SPEED_OID)),  # UBIQUITI
+)
+
+@lru_cache(maxsize=256)
+def oid_plan(vendor):
+    """OID tuple for a vendor/model string, or None. Few distinct strings -> memoised."""
+    vendor = vendor.lower()
+    for keywords, oids in VENDOR_OID_PLANS:
+        if any(k in vendor for k in keywords): return oids
     return None
 
-def get_real_stats(ip, vendor):
-    """Fetches REAL data from devices based on Vendor."""
+def get_real_stats(ip, vendor, fresh=False):
+    """Fetches REAL data from devices based on Vendor. fresh skips the SNMP TTL cache."""
     rssi = 0
     speed = "Unknown"
     duplex = "Unknown"
-    
-    # Defaults
-    if not vendor: vendor = "Unknown"
-
-    # --- CAMBIUM ePMP ---
-    if "cambium" in vendor.lower() or "epmp" in vendor.lower():
-        val = snmp_get(ip, '1.3.6.1.4.1.17713.21.1.2.1.0')
-        if val: rssi = int(val)
-
-        # LAN Speed (Port 1)
-        lan_val = snmp_get(ip, '1.3.6.1.2.1.2.2.1.5.1') 
-        if lan_val:
-            s = int(lan_val)
-            if s == 100000000: speed = "100Mbps"
-            elif s == 1000000000: speed = "1Gbps"
-            elif s == 10000000: speed = "10Mbps"
-            duplex = "Full" 
-
-    # --- UBIQUITI ---
-    elif "ubiquiti" in vendor.lower() or "powerbeam" in vendor.lower() or "nano" in vendor.lower():
-        val = snmp_get(ip, '1.3.6.1.4.1.41112.1.4.5.1.5.1')
-        if val: rssi = int(val)
-        
-        lan_val = snmp_get(ip, '1.3.6.1.2.1.2.2.1.5.1')
-        if lan_val:
-            s = int(lan_val)
-            if s == 100000000: speed = "100Mbps"
-            elif s == 1000000000: speed = "1Gbps"
-            duplex = "Full"
+
+    oids = oid_plan(vendor or "Unknown")
+    if not oids: return rssi, speed, duplex
+
+    # RSSI + LAN Speed (Port 1) in one request
+    val, lan_val = snmp_get_many(ip, oids, fresh)
+    if val: rssi = int(val)
+
+    if lan_val:
+        speed = SPEED_NAMES.get(int(lan_val), speed)
+        duplex = "Full"
 
     return rssi, speed, duplex
 
@@ -79,53 +152,208 @@ def ping_host(ip):
     if not ip or ip.lower() == 'nan' or ip == '': return 0, 100.0
     try:
         res = subprocess.run(['ping', '-n', '1', '-w', str(PING_TIMEOUT_MS), ip], 
-                             stdout=subprocess.PIPE, text=True)
-        if "Received = 1" in res.stdout:
-            match = re.search(r"time[=<](\d+)ms", res.stdout)
+                             stdout=subprocess.PIPE)
+        if _PING_RECEIVED in res.stdout:
+            match = _PING_TIME_RE.search(res.stdout)
             return int(match.group(1)) if match else 1, 0.0
         return 0, 100.0
     except:
         return 0, 100.0
 
+def _ping_targets(ips):
+    return [ip for ip in dict.fromkeys(ips) if ip and ip.lower() not in ('nan', 'none')]
+
+def _fping_cmd(targets):
+    return [FPING, '-q', '-c', '1', '-t', str(PING_TIMEOUT_MS), *targets]
+
+def _parse_fping(stderr, targets):
+    """Parses fping -q summary lines by splitting (no regex per line), e.g.
+    10.0.0.1 : xmt/rcv/%loss = 1/1/0%, min/avg/max = 0.4/0.4/0.4
+    """
+    results = {ip: (0, 100.0) for ip in targets}
+    for line in stderr.splitlines():
+        ip, _, rest = line.partition(' : ')
+        ip = ip.strip()
+        if ip not in results or '%loss' not in rest: continue
+        loss_part, _, lat_part = rest.partition(',')
+        try:
+            loss = float(loss_part.rsplit('/', 1)[1].strip().rstrip('%'))
+            avg = float(lat_part.split('=')[1].split('/')[1]) if lat_part else None
+        except (IndexError, ValueError):
+            continue  # malformed line -> host stays DOWN
+        results[ip] = (max(1, round(avg)) if avg is not None else 0, loss)
+    return results
+
+def _icmp_sockets_allowed():
+    # Probe once: a refused socket inside multiping logs a traceback per host
+    try:
+        ICMPv4Socket(privileged=False).close()
+        return True
+    except ICMPLibError:
+        return False
+
+_icmp_usable = HAS_ICMPLIB and _icmp_sockets_allowed()
+
+def _icmp_results(targets, hosts):
+    return {ip: (max(1, round(h.avg_rtt)) if h.is_alive else 0, h.packet_loss * 100.0)
+            for ip, h in zip(targets, hosts)}
+
+def _is_ipv4(ip):
+    try:
+        ipaddress.IPv4Address(ip)
+        return True
+    except ValueError:
+        return False
+
+def _icmp_targets(targets):
+    # Only IPv4 literals go to icmplib: names would be DNS-resolved (one failed lookup
+    # raises for the whole batch), and _icmp_usable latches on ICMPv4 alone, so an ICMPv6
+    # permission error can't turn it off for every v4 radio. The rest use fping/threads.
+    return [ip for ip in targets if _is_ipv4(ip)] if _icmp_usable else []
+
+def _ping_each(targets):
+    # Last resort (no icmplib/fping, e.g. bare Windows): plain pings, concurrently
+    with ThreadPoolExecutor(max_workers=min(32, len(targets))) as ex:
+        return dict(zip(targets, ex.map(ping_host, targets)))
+
+def ping_hosts(ips):
+    """Pings many hosts in one batch: icmplib, else ONE fping process, else threads.
+    Returns {ip: (latency_ms, loss_pct)}."""
+    global _icmp_usable
+    targets = _ping_targets(ips)
+    if not targets: return {}
+
+    results = {}
+    literals = _icmp_targets(targets)
+    if literals:
+        try:
+            results = _icmp_results(literals, multiping(
+                literals, count=1, timeout=PING_TIMEOUT_MS / 1000, privileged=False))
+            targets = [ip for ip in targets if ip not in results]
+        except SocketPermissionError:
+            _icmp_usable = False  # ping_group_range excludes us -> use fping from now on
+        except ICMPLibError:
+            pass  # this batch only; retry icmplib next time
+        if not targets: return results
+
+    if FPING:
+        try:
+            res = subprocess.run(_fping_cmd(targets),
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            results.update(_parse_fping(res.stderr, targets))
+            return results
+        except OSError:
+            pass
+
+    results.update(_ping_each(targets))
+    return results
+
+async def ping_hosts_async(ips):
+    """ping_hosts() for async callers: icmplib/fping are awaited, no thread held."""
+    global _icmp_usable
+    targets = _ping_targets(ips)
+    if not targets: return {}
+
+    results = {}
+    literals = _icmp_targets(targets)
+    if literals:
+        try:
+            results = _icmp_results(literals, await async_multiping(
+                literals, count=1, timeout=PING_TIMEOUT_MS / 1000, privileged=False))
+            targets = [ip for ip in targets if ip not in results]
+        except SocketPermissionError:
+            _icmp_usable = False
+        except ICMPLibError:
+            pass
+        if not targets: return results
+
+    if FPING:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *_fping_cmd(targets), stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+        except OSError:
+            proc = None
+        if proc:
+            try:
+                _, err = await asyncio.wait_for(proc.communicate(), timeout=10)
+            except asyncio.TimeoutError:
+                proc.kill()
+                results.update((ip, (0, 100.0)) for ip in targets)
+                return results
+            results.update(_parse_fping(err.decode(errors='replace'), targets))
+            return results
+    results.update(await asyncio.to_thread(_ping_each, targets))
+    return results
+
+# Long-lived so each worker keeps its SnmpEngine from one cycle to the next
+SNMP_WORKERS = 32
+_snmp_pool = ThreadPoolExecutor(max_workers=SNMP_WORKERS, thread_name_prefix='snmp')
+
+def _link_stats(link):
+    return get_real_stats(link.client_ip, link.vendor or link.model or "Unknown")
+
+Session = sessionmaker(bind=engine)  # built once; each cycle checks a pooled connection out
+
 def scan_cycle():
-    Session = sessionmaker(bind=engine)
     session = Session()
-    links = session.query(Link).filter_by(is_active=True).all()
+    # Just the columns the scan reads, as plain rows (no ORM objects to hydrate/track)
+    links = session.execute(
+        select(Link.id, Link.client_ip, Link.vendor, Link.model, Link.link_name, Link.eth_speed)
+        .where(Link.is_active.is_(True))
+    ).all()
     
     print(f"--- REAL SCAN STARTED: {len(links)} Links ---")
     
+    # 1. Ping - every link in one batch (a single fping process when available)
+    pings = ping_hosts([link.client_ip for link in links])
+
+    # 2. SNMP - all reachable radios concurrently: the sweep costs ~1 timeout, not N
+    # Down links never reach the SNMP stage (their log rows are built from the ping alone)
+    up_ips = {ip for ip, (_, loss) in pings.items() if loss == 0} if HAS_SNMP else set()
+    up = [link for link in links if link.client_ip in up_ips]
+    stats = dict(zip((link.id for link in up), _snmp_pool.map(_link_stats, up)))
+    # Share good reads with the API's stats cache, so dashboard scans skip SNMP
+    cache_set_many({f'{STATS_KEY}:{link.client_ip}': json.dumps(stats[link.id])
+                    for link in up if stats[link.id][0] != 0}, STATS_TTL)
+
+    log_rows = []
+    eth_rows = []
     for link in links:
-        # 1. Ping
-        lat, loss = ping_host(link.client_ip)
+        lat, loss = pings.get(link.client_ip, (0, 100.0))
         
-        # 2. SNMP
         rssi = 0
-        if loss == 0 and HAS_SNMP:
-            vendor = link.vendor or link.model or "Unknown"
-            rssi_val, speed_val, duplex_val = get_real_stats(link.client_ip, vendor)
-            
-            rssi = rssi_val
-            link.eth_speed = speed_val
-            link.eth_duplex = duplex_val
+        speed = link.eth_speed
+        if link.id in stats:
+            rssi, speed, duplex = stats[link.id]
+            eth_rows.append({'id': link.id, 'eth_speed': speed, 'eth_duplex': duplex})
         
         # 3. Status
         status = "UP"
         if loss == 100: status = "DOWN"
         elif rssi != 0 and rssi < -75: status = "DEGRADED"
         
-        # 4. Save
-        log = MonitoringLog(link_id=link.id, status=status, latency=lat, loss=loss, rssi=rssi)
-        session.add(log)
+        # 4. Save (queued - written in bulk below)
+        log_rows.append({'link_id': link.id, 'status': status, 'latency': lat, 'loss': loss, 'rssi': rssi})
         
         # 5. Console Print (SAFE VERSION)
         icon = "🟢" if status == "UP" else ("🔴" if status == "DOWN" else "🟠")
         safe_name = (link.link_name or "Unknown")[:15] # <--- FIX HERE
-        print(f"{icon} {safe_name:<15} | {link.client_ip} | {rssi}dBm | {link.eth_speed}")
+        print(f"{icon} {safe_name:<15} | {link.client_ip} | {rssi}dBm | {speed}")
 
+    # One executemany per table instead of an ORM object + INSERT per link
+    if eth_rows: session.bulk_update_mappings(Link, eth_rows)
+    if log_rows: session.execute(insert(MonitoringLog), log_rows)
     session.commit()
     session.close()
 
+SCAN_INTERVAL = 30  # seconds between cycle STARTS
+
 if __name__ == "__main__":
+    init_db()
+    next_tick = time.monotonic()
     while True:
         scan_cycle()
-        time.sleep(30)
\ No newline at end of file
+        # Fixed cadence: scan time comes out of the wait instead of adding to it.
+        # An overrun starts the next cycle at once, without a burst of catch-up cycles.
+        next_tick = max(next_tick + SCAN_INTERVAL, time.monotonic())
+        time.sleep(max(0, next_tick - time.monotonic()))
\ No newline at end of file